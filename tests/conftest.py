@@ -0,0 +1,5 @@
+# tests/conftest.py
+# Cocotb test modules only run inside the simulator (launched from test_runners.py);
+# keep pytest from collecting their @cocotb.test() coroutines as ordinary tests.
+# test_simple_alu.py also needs cocotb_config, which does not exist yet.
+collect_ignore = ["test_decoder.py", "test_controller.py", "test_simple_alu.py"]
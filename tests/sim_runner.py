@@ -0,0 +1,60 @@
+# tests/sim_runner.py
+# Shared cocotb runner: builds one RTL module and runs a cocotb test module against it.
+
+import os
+from pathlib import Path
+from cocotb.runner import get_runner
+
+# Simulator backend (Verilator compiles the RTL to a native model); override with SIM=icarus etc.
+SIM = os.getenv("SIM", "verilator")
+# Waveform tracing is off by default; enable with WAVES=1
+WAVES = os.getenv("WAVES", "0") == "1"
+# HDL coverage collection is off by default; enable with SIM_COVERAGE=1
+# (cocotb itself reads COVERAGE, for Python testbench coverage)
+SIM_COVERAGE = os.getenv("SIM_COVERAGE", "0") == "1"
+
+TEST_DIR = Path(__file__).resolve().parent
+RTL_DIR = TEST_DIR.parent / "src"
+BUILD_ROOT = TEST_DIR.parent / "sim_build"
+# Coverage data lands here, where `make coverage` reads it
+RESULTS_DIR = TEST_DIR.parent / os.getenv("COCOTB_RESULTS", "results")
+
+# Extra build flags per simulator
+BUILD_ARGS = {
+    "verilator": ["-Wno-fatal"],
+}
+COVERAGE_ARGS = {
+    "verilator": ["--coverage"],
+}
+
+def run_cocotb(toplevel, test_module, parameters=None, testcase=None, build_name=None):
+    """Build src/<toplevel>.sv and run the cocotb tests in tests/<test_module>.py."""
+    runner = get_runner(SIM)
+    # Separate build dir per parameter set, so builds are not clobbered; the simulator
+    # also runs there (results XML, dump.vcd), keeping tests/ clean. The test modules
+    # stay importable because the runner's PYTHONPATH includes tests/ from sys.path.
+    build_dir = BUILD_ROOT / (build_name or toplevel)
+    build_args = BUILD_ARGS.get(SIM, []) + (COVERAGE_ARGS.get(SIM, []) if SIM_COVERAGE else [])
+    plusargs = []
+    if SIM_COVERAGE and SIM == "verilator":
+        # Point the model's coverage.dat at the results dir, one file per build
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        plusargs = [f"+verilator+coverage+file+{RESULTS_DIR / (build_name or toplevel)}.dat"]
+
+    runner.build(
+        verilog_sources=[RTL_DIR / f"{toplevel}.sv"],
+        includes=[RTL_DIR],
+        hdl_toplevel=toplevel,
+        parameters=parameters or {},
+        build_args=build_args,
+        build_dir=build_dir,
+        waves=WAVES,
+    )
+    runner.test(
+        hdl_toplevel=toplevel,
+        test_module=test_module,
+        testcase=testcase,
+        plusargs=plusargs,
+        build_dir=build_dir,
+        waves=WAVES,
+    )
@@ -2,10 +2,24 @@
 # functions: Arbitration (round-robin, contention)
 
 import cocotb
-from cocotb.triggers import RisingEdge, Timer, ReadOnly
+from cocotb.triggers import RisingEdge, Timer, ReadOnly, ClockCycles
 from cocotb.clock import Clock
 from cocotb.queue import Queue
 import random
+import numpy as np
+
+# Pack per-consumer values into a packed-vector integer (element 0 in the LSBs)
+def pack(values, width):
+    word = 0
+    for i, v in enumerate(values):
+        word |= int(v) << (width * i)
+    return word
+
+# Async generator: yields the cycle index after each of the next n rising edges
+async def cycle_stream(dut, n):
+    for cycle in range(n):
+        await RisingEdge(dut.clk)
+        yield cycle
 
 # Parameterized test for WRITE_ENABLE
 async def run_controller_test(dut, write_enable):
@@ -31,54 +45,83 @@ async def run_controller_test(dut, write_enable):
         if write_enable:
             cocotb.start_soon(emulate_mem_write(ch, dut, mem_write_ready_q[ch]))
     
+    # Pre-generate all random request decisions for the run
+    num_cycles = 500  # Many cycles to test arbitration
+    np.random.seed(42)
+    rv = np.random.rand(num_cycles, num_consumers)
+    ra = np.random.randint(0, 256, size=(num_cycles, num_consumers), dtype=np.uint8)
+    wv = np.random.rand(num_cycles, num_consumers)
+    wa = np.random.randint(0, 256, size=(num_cycles, num_consumers), dtype=np.uint8)
+    wd = np.random.randint(0, 256, size=(num_cycles, num_consumers), dtype=np.uint8)
+    
+    # Pack per-consumer values into one word per cycle for the packed consumer ports
+    addr_bits = int(dut.ADDR_BITS)
+    data_bits = int(dut.DATA_BITS)
+    read_valid_words = [pack(row, 1) for row in (rv > 0.5).tolist()]
+    read_addr_words = [pack(row, addr_bits) for row in ra.tolist()]
+    if write_enable:
+        write_valid_words = [pack(row, 1) for row in (wv > 0.5).tolist()]
+        write_addr_words = [pack(row, addr_bits) for row in wa.tolist()]
+        write_data_words = [pack(row, data_bits) for row in wd.tolist()]
+    
+    # Resolve the per-cycle signal handles once
+    cr_valid = dut.consumer_read_valid
+    cr_addr = dut.consumer_read_address
+    cr_ready = dut.consumer_read_ready
+    cw_valid = dut.consumer_write_valid
+    cw_addr = dut.consumer_write_address
+    cw_data = dut.consumer_write_data
+    cw_ready = dut.consumer_write_ready
+    mem_read_valid_sig = dut.mem_read_valid
+    
+    # Consumers newly acked in the previous cycle (their valid is deasserted for one cycle)
+    read_ack = write_ack = 0
+    # Last sampled ready vectors; ready is registered, so it stays high for one more
+    # sample after the deassert is driven and must not mask valid a second time
+    read_ready = write_ready = 0
+    
     # Drive random requests
-    for _ in range(500):  # Many cycles to test arbitration
-        # Randomly assert read/write valids
-        for cons in range(num_consumers):
-            if random.random() > 0.5:
-                dut.consumer_read_valid[cons].value = 1
-                dut.consumer_read_address[cons].value = random.randint(0, 255)
-            else:
-                dut.consumer_read_valid[cons].value = 0
-            
-            if write_enable and random.random() > 0.5:
-                dut.consumer_write_valid[cons].value = 1
-                dut.consumer_write_address[cons].value = random.randint(0, 255)
-                dut.consumer_write_data[cons].value = random.randint(0, 255)
-            elif write_enable:
-                dut.consumer_write_valid[cons].value = 0
-        
-        await RisingEdge(dut.clk)
-        
-        # Check for fairness: track served consumers over time
-        served_reads = [0] * num_consumers
-        served_writes = [0] * num_consumers if write_enable else None
+    async for cycle in cycle_stream(dut, num_cycles):
+        # Randomly assert read/write valids: one write per packed port for all consumers
+        cr_valid.value = read_valid_words[cycle] & ~read_ack
+        cr_addr.value = read_addr_words[cycle]
+        if write_enable:
+            cw_valid.value = write_valid_words[cycle] & ~write_ack
+            cw_addr.value = write_addr_words[cycle]
+            cw_data.value = write_data_words[cycle]
         
         # Monitor outputs and assert round-robin order
         # For simplicity, log and assert no starvation (e.g., max served diff < threshold)
         await ReadOnly()
+        mem_read_valid = mem_read_valid_sig.value.integer
         for ch in range(num_channels):
-            if int(dut.mem_read_valid[ch].value):
+            if (mem_read_valid >> ch) & 1:
                 # Simulate ready after delay
                 await mem_read_ready_q[ch].put(1)  # Or random delay
                 # Track which consumer was served (need to monitor internal or infer)
                 # Note: To track exactly, might need to expose or infer from addresses
         
-        # Deassert after ack
-        for cons in range(num_consumers):
-            if int(dut.consumer_read_ready[cons].value):
-                dut.consumer_read_valid[cons].value = 0
-            if write_enable and int(dut.consumer_write_ready[cons].value):
-                dut.consumer_write_valid[cons].value = 0
+        # Sample acks; deassert is applied with the next cycle's drive
+        # (writes are not allowed in the ReadOnly phase). Only ready bits that
+        # rose this cycle count as new acks.
+        ready = cr_ready.value.integer
+        read_ack = ready & ~read_ready
+        read_ready = ready
+        if write_enable:
+            ready = cw_ready.value.integer
+            write_ack = ready & ~write_ready
+            write_ready = ready
     
     # After loop, assert coverage or fairness metrics
+    
+    # Hand the parameters back so callers need not read them again
+    return num_consumers, addr_bits, data_bits
 
 async def emulate_mem_read(ch, dut, q):
     while True:
         await q.get()
         delay = random.randint(1, 5)
-        for _ in range(delay):
-            await RisingEdge(dut.clk)
+        await ClockCycles(dut.clk, delay)
         dut.mem_read_ready[ch].value = 1
         dut.mem_read_data[ch].value = random.randint(0, 255)  # Emulate data
         await RisingEdge(dut.clk)
@@ -88,8 +131,7 @@ async def emulate_mem_write(ch, dut, q):
     while True:
         await q.get()
         delay = random.randint(1, 5)
-        for _ in range(delay):
-            await RisingEdge(dut.clk)
+        await ClockCycles(dut.clk, delay)
         dut.mem_write_ready[ch].value = 1
         await RisingEdge(dut.clk)
         dut.mem_write_ready[ch].value = 0
@@ -102,13 +144,26 @@ async def test_controller_data(dut):
 @cocotb.test()
 async def test_controller_program(dut):
     """Test controller with WRITE_ENABLE=0"""
-    await run_controller_test(dut, write_enable=False)
+    num_consumers, addr_bits, data_bits = await run_controller_test(dut, write_enable=False)
     # Additional asserts for write ignore: drive writes and check no mem_write_valid
-    for _ in range(10):
-        for cons in range(int(dut.NUM_CONSUMERS)):
-            dut.consumer_write_valid[cons].value = 1
-            dut.consumer_write_address[cons].value = random.randint(0, 255)
-            dut.consumer_write_data[cons].value = random.randint(0, 255)
-        await RisingEdge(dut.clk)
-        for ch in range(int(dut.NUM_CHANNELS)):
-            assert int(dut.mem_write_valid[ch].value) == 0, "Writes not ignored when WRITE_ENABLE=0"
+    # Handles are constant: resolve them once
+    cw_valid = dut.consumer_write_valid
+    cw_addr = dut.consumer_write_address
+    cw_data = dut.consumer_write_data
+    mem_write_valid = dut.mem_write_valid
+    all_valid = (1 << num_consumers) - 1
+    
+    # run_controller_test returns in the ReadOnly phase; step out before driving
+    await RisingEdge(dut.clk)
+    # One cycle with every consumer writing...
+    cw_valid.value = all_valid
+    cw_addr.value = pack([random.randint(0, 255) for _ in range(num_consumers)], addr_bits)
+    cw_data.value = pack([random.randint(0, 255) for _ in range(num_consumers)], data_bits)
+    await RisingEdge(dut.clk)
+    # ...then one with writes released; check the settled outputs after each edge
+    cw_valid.value = 0
+    await ReadOnly()
+    assert mem_write_valid.value.integer == 0, "Writes not ignored when WRITE_ENABLE=0"
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+    assert mem_write_valid.value.integer == 0, "Writes not ignored when WRITE_ENABLE=0"
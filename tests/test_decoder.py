@@ -3,74 +3,62 @@
 
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
-from cocotb.binary import BinaryValue
-import random
+from cocotb.triggers import RisingEdge, FallingEdge, ReadOnly, Timer
+import numpy as np
 
 # Number of test iterations
 NUM_TESTS = 1000
 
-# Golden model: Python function to decode instruction (for scoreboard)
-def golden_decoder(instr):
-    opcode = (instr >> 12) & 0xF
-    rd = rs = rt = imm8 = cond = 0
-    is_nop = is_branch = is_cmp = is_add = is_sub = is_mul = is_div = is_ldr = is_str = is_const = is_halt = 0
+# Golden model fields, in DUT output order
+GOLDEN_FIELDS = ('opcode', 'rd', 'rs', 'rt', 'imm8', 'cond',
+                 'is_nop', 'is_branch', 'is_cmp', 'is_add', 'is_sub', 'is_mul', 'is_div',
+                 'is_ldr', 'is_str', 'is_const', 'is_halt')
 
-    if opcode == 0x0:  # NOP
-        is_nop = 1
-    elif opcode == 0x1:  # BRNzp
-        is_branch = 1
-        cond = (instr >> 8) & 0xF
-        imm8 = instr & 0xFF
-    elif opcode == 0x2:  # CMP
-        is_cmp = 1
-        rs = (instr >> 4) & 0xF
-        rt = instr & 0xF
-    elif opcode == 0x3:  # ADD
-        is_add = 1
-        rd = (instr >> 8) & 0xF
-        rs = (instr >> 4) & 0xF
-        rt = instr & 0xF
-    elif opcode == 0x4:  # SUB
-        is_sub = 1
-        rd = (instr >> 8) & 0xF
-        rs = (instr >> 4) & 0xF
-        rt = instr & 0xF
-    elif opcode == 0x5:  # MUL
-        is_mul = 1
-        rd = (instr >> 8) & 0xF
-        rs = (instr >> 4) & 0xF
-        rt = instr & 0xF
-    elif opcode == 0x6:  # DIV
-        is_div = 1
-        rd = (instr >> 8) & 0xF
-        rs = (instr >> 4) & 0xF
-        rt = instr & 0xF
-    elif opcode == 0x7:  # LDR
-        is_ldr = 1
-        rd = (instr >> 8) & 0xF
-        rs = (instr >> 4) & 0xF
-    elif opcode == 0x8:  # STR
-        is_str = 1
-        rs = (instr >> 4) & 0xF
-        rt = instr & 0xF
-    elif opcode == 0x9:  # CONST
-        is_const = 1
-        rd = (instr >> 8) & 0xF
-        imm8 = instr & 0xFF
-    elif opcode == 0xF:  # HALT
-        is_halt = 1
-    else:  # Default: NOP
-        is_nop = 1
+# DUT output ports, in GOLDEN_FIELDS order
+DECODER_SIGNALS = ('opcode', 'Rd', 'Rs', 'Rt', 'IMM8', 'condition',
+                   'is_nop', 'is_branch', 'is_cmp', 'is_add', 'is_sub', 'is_mul', 'is_div',
+                   'is_ldr', 'is_str', 'is_const', 'is_halt')
 
-    return {
+# Golden model: vectorized decode of an array of instructions (for scoreboard)
+def golden_decoder(instrs):
+    instrs = np.asarray(instrs, dtype=np.uint16)
+    opcode = (instrs >> 12) & 0xF
+    f_rd = (instrs >> 8) & 0xF
+    f_rs = (instrs >> 4) & 0xF
+    f_rt = instrs & 0xF
+    f_imm8 = instrs & 0xFF
+
+    is_branch = opcode == 0x1  # BRNzp
+    is_cmp = opcode == 0x2     # CMP
+    is_add = opcode == 0x3     # ADD
+    is_sub = opcode == 0x4     # SUB
+    is_mul = opcode == 0x5     # MUL
+    is_div = opcode == 0x6     # DIV
+    is_ldr = opcode == 0x7     # LDR
+    is_str = opcode == 0x8     # STR
+    is_const = opcode == 0x9   # CONST
+    is_halt = opcode == 0xF    # HALT
+    is_arith = is_add | is_sub | is_mul | is_div
+    # NOP, plus default for invalid opcodes
+    is_nop = ~(is_branch | is_cmp | is_arith | is_ldr | is_str | is_const | is_halt)
+
+    columns = {
         'opcode': opcode,
-        'rd': rd, 'rs': rs, 'rt': rt,
-        'imm8': imm8, 'cond': cond,
+        'rd': np.where(is_arith | is_ldr | is_const, f_rd, 0),
+        'rs': np.where(is_cmp | is_arith | is_ldr | is_str, f_rs, 0),
+        'rt': np.where(is_cmp | is_arith | is_str, f_rt, 0),
+        'imm8': np.where(is_branch | is_const, f_imm8, 0),
+        'cond': np.where(is_branch, f_rd, 0),
         'is_nop': is_nop, 'is_branch': is_branch, 'is_cmp': is_cmp,
         'is_add': is_add, 'is_sub': is_sub, 'is_mul': is_mul, 'is_div': is_div,
         'is_ldr': is_ldr, 'is_str': is_str, 'is_const': is_const, 'is_halt': is_halt
     }
+    return {name: col.astype(np.uint8) for name, col in columns.items()}
+
+# Precomputed golden results for the whole 16-bit instruction space (decoded once at import)
+# Row i holds the field values for instruction i, in GOLDEN_FIELDS order
+_golden_cols = golden_decoder(np.arange(1 << 16, dtype=np.uint16))
+GOLDEN_TABLE = np.column_stack([_golden_cols[name] for name in GOLDEN_FIELDS])
 
 # Reusable reset coroutine
 async def reset_dut(dut):
@@ -87,46 +75,52 @@ async def test_decoder_basic(dut):
     
     await reset_dut(dut)
     
-    # Seed for reproducibility
-    random.seed(42)
+    # Generate all random 16-bit instructions up front (seeded for reproducibility)
+    rng = np.random.default_rng(42)
+    instrs = rng.integers(0, 1 << 16, size=NUM_TESTS, dtype=np.uint16)
+    
+    # Resolve signal handles once, outside the loop
+    sig_instruction = dut.instruction
+    handles = [getattr(dut, name) for name in DECODER_SIGNALS]
     
-    for _ in range(NUM_TESTS):
-        # Generate random 16-bit instruction
-        instr_val = random.randint(0, 0xFFFF)
-        dut.instruction.value = BinaryValue(instr_val, n_bits=16)
+    # Record all DUT outputs; checked against the golden model in one batch afterwards
+    dut_results = np.empty((NUM_TESTS, len(DECODER_SIGNALS)), dtype=np.int32)
+    for i, instr_val in enumerate(instrs.tolist()):
+        # Drive away from the sampling edge (also leaves the previous ReadOnly phase)
+        await FallingEdge(dut.clk)
+        sig_instruction.value = instr_val
         
-        # Wait for register update
+        # Wait for register update, then sample the settled outputs
         await RisingEdge(dut.clk)
+        await ReadOnly()
         
-        # Get DUT outputs
-        dut_out = {
-            'opcode': int(dut.opcode.value),
-            'rd': int(dut.Rd.value),
-            'rs': int(dut.Rs.value),
-            'rt': int(dut.Rt.value),
-            'imm8': int(dut.IMM8.value),
-            'cond': int(dut.condition.value),
-            'is_nop': int(dut.is_nop.value),
-            'is_branch': int(dut.is_branch.value),
-            'is_cmp': int(dut.is_cmp.value),
-            'is_add': int(dut.is_add.value),
-            'is_sub': int(dut.is_sub.value),
-            'is_mul': int(dut.is_mul.value),
-            'is_div': int(dut.is_div.value),
-            'is_ldr': int(dut.is_ldr.value),
-            'is_str': int(dut.is_str.value),
-            'is_const': int(dut.is_const.value),
-            'is_halt': int(dut.is_halt.value)
-        }
-        
-        # Golden model prediction
-        golden = golden_decoder(instr_val)
-        
-        # Assert equality
-        assert dut_out == golden, f"Mismatch for instr {hex(instr_val)}: DUT {dut_out} vs Golden {golden}"
+        dut_results[i] = [h.value.integer for h in handles]
+    
+    # Golden model predictions for the whole batch
+    golden_results = GOLDEN_TABLE[instrs]
+    
+    # Assert equality (dicts only built for the failure message)
+    mismatches = np.flatnonzero((dut_results != golden_results).any(axis=1))
+    for i in mismatches[:10]:
+        dut._log.error(f"Mismatch for instr {hex(instrs[i])}: DUT {dict(zip(GOLDEN_FIELDS, dut_results[i].tolist()))} vs Golden {dict(zip(GOLDEN_FIELDS, golden_results[i].tolist()))}")
+    assert mismatches.size == 0, f"{mismatches.size} of {NUM_TESTS} instructions mismatched (first: {hex(instrs[mismatches[0]]) if mismatches.size else None})"
     
     dut._log.info(f"Passed {NUM_TESTS} random tests.")
 
+# Async generator: drives each opcode (random operand bits) and yields it once the
+# register update has settled (ReadOnly phase; the next drive waits for the falling edge)
+async def invalid_probes(dut, opcodes):
+    sig_instruction = dut.instruction
+    # Random operand bits, seeded for reproducibility
+    operands = np.random.default_rng(42).integers(0, 0x1000, size=len(opcodes)).tolist()
+    for op, operand in zip(opcodes, operands):
+        await FallingEdge(dut.clk)
+        instr_val = (op << 12) | operand
+        sig_instruction.value = instr_val
+        await RisingEdge(dut.clk)
+        await ReadOnly()
+        yield op, instr_val
+
 @cocotb.test()
 async def test_decoder_invalid(dut):
     """Test invalid opcodes default to NOP."""
@@ -135,24 +129,22 @@ async def test_decoder_invalid(dut):
     
     await reset_dut(dut)
     
+    # Resolve signal handles once, outside the loop
+    handles = [(name, getattr(dut, name)) for name in DECODER_SIGNALS]
+    other_is_signals = ['is_branch', 'is_cmp', 'is_add', 'is_sub', 'is_mul', 'is_div', 'is_ldr', 'is_str', 'is_const', 'is_halt']
+    
     invalid_opcodes = [0b1010, 0b1011, 0b1100, 0b1101, 0b1110]
-    for op in invalid_opcodes:
-        instr_val = (op << 12) | random.randint(0, 0xFFF)
-        dut.instruction.value = BinaryValue(instr_val, n_bits=16)
-        
-        await RisingEdge(dut.clk)
+    async for op, instr_val in invalid_probes(dut, invalid_opcodes):
+        # Snapshot every output once, then assert against the snapshot
+        snap = {name: handle.value.integer for name, handle in handles}
         
-        assert int(dut.is_nop.value) == 1, f"Invalid opcode {bin(op)} not treated as NOP"
-        assert int(dut.opcode.value) == op, "Opcode mismatch"
-        assert int(dut.Rd.value) == 0, "Rd not zero for invalid"
-        assert int(dut.Rs.value) == 0, "Rs not zero for invalid"
-        assert int(dut.Rt.value) == 0, "Rt not zero for invalid"
-        assert int(dut.IMM8.value) == 0, "IMM8 not zero for invalid"
-        assert int(dut.condition.value) == 0, "Condition not zero for invalid"
+        assert snap['is_nop'] == 1, f"Invalid opcode {bin(op)} not treated as NOP"
+        assert snap['opcode'] == op, "Opcode mismatch"
+        for name in ('Rd', 'Rs', 'Rt', 'IMM8', 'condition'):
+            assert snap[name] == 0, f"{name} not zero for invalid"
         
         # Ensure other is_ signals are 0
-        other_is_signals = ['is_branch', 'is_cmp', 'is_add', 'is_sub', 'is_mul', 'is_div', 'is_ldr', 'is_str', 'is_const', 'is_halt']
         for sig in other_is_signals:
-            assert int(dut.__getattr__(sig).value) == 0, f"Unexpected {sig} active on invalid instr {hex(instr_val)}"
+            assert snap[sig] == 0, f"Unexpected {sig} active on invalid instr {hex(instr_val)}"
     
     dut._log.info("Passed invalid opcode tests.")
@@ -0,0 +1,16 @@
+# tests/test_runners.py
+# Pytest entry points: each builds one RTL module and runs its cocotb test module in the simulator.
+
+from sim_runner import run_cocotb
+
+def test_decoder_runner():
+    run_cocotb("decoder", "test_decoder")
+
+# controller.sv is built once per WRITE_ENABLE value and runs the matching cocotb test
+def test_controller_data_runner():
+    run_cocotb("controller", "test_controller", parameters={"WRITE_ENABLE": 1},
+               testcase="test_controller_data", build_name="controller_data")
+
+def test_controller_program_runner():
+    run_cocotb("controller", "test_controller", parameters={"WRITE_ENABLE": 0},
+               testcase="test_controller_program", build_name="controller_program")
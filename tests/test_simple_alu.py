@@ -3,14 +3,18 @@
 
 import cocotb
 from cocotb.triggers import Timer
-from cocotb.binary import BinaryValue
-import random
+import numpy as np
+from numba import njit
 from cocotb_config import *  # Import global config
 
 # Number of test iterations
 NUM_TESTS = 1000
 
-# Golden model for ALU
+# Operations under test: CMP/arith/invalid
+ALU_OPS = np.array([0x2, 0x3, 0x4, 0x5, 0x6, 0xF], dtype=np.uint8)
+
+# Golden model for ALU (JIT-compiled; returns (result, nzp))
+@njit(cache=True)
 def golden_alu(a, b, op):
     result = 0
     nzp = 0
@@ -32,34 +36,63 @@ def golden_alu(a, b, op):
         else:
             nzp = 0b001
     # Defaults: result=0, nzp=0 for invalid
-    return {'result': result, 'nzp': nzp}
+    return result, nzp
+
+# Batched golden model: evaluates whole A/B/op arrays in one call
+@njit(cache=True)
+def golden_alu_batch(a_vals, b_vals, ops):
+    n = a_vals.shape[0]
+    results = np.zeros(n, dtype=np.uint8)
+    nzps = np.zeros(n, dtype=np.uint8)
+    for i in range(n):
+        results[i], nzps[i] = golden_alu(int(a_vals[i]), int(b_vals[i]), int(ops[i]))
+    return results, nzps
+
+# Resolved per-thread ALU handles, keyed by (core_id, thread_id)
+ALU_HANDLES = {}
+
+# Walk the GPU hierarchy to a thread's ALU once; later lookups hit the cache
+def get_alu(gpu, core_id, thread_id):
+    key = (core_id, thread_id)
+    if key not in ALU_HANDLES:
+        ALU_HANDLES[key] = gpu.cores[core_id].core_instance.threads[thread_id].alu_inst
+    return ALU_HANDLES[key]
 
 @cocotb.test()
 async def test_simple_alu(dut):
     """Test ALU with random ops/A/B."""
     # Access submodule (pick core 0, thread 0; 2nd-order: ALU per-thread, sample one)
-    alu_dut = gpu_dut.cores[0].core_instance.threads[0].alu_inst  # TO edit
-
-    random.seed(42)  # Reproducible
+    alu_dut = get_alu(gpu_dut, 0, 0)  # TO edit
+    # Port handles resolved once, outside the loop
+    sig_a = alu_dut.A
+    sig_b = alu_dut.B
+    sig_op = alu_dut.operation
+    sig_result = alu_dut.result
+    sig_nzp = alu_dut.NZP
 
-    for _ in range(NUM_TESTS):
-        a_val = random.randint(0, 0xFF)
-        b_val = random.randint(0, 0xFF)
-        op_val = random.choice([0x2, 0x3, 0x4, 0x5, 0x6, 0xF])  # CMP/arith/invalid
+    # Draw all stimulus up front
+    np.random.seed(42)  # Reproducible
+    a_vals = np.random.randint(0, 256, size=NUM_TESTS, dtype=np.uint8)
+    b_vals = np.random.randint(0, 256, size=NUM_TESTS, dtype=np.uint8)
+    ops = ALU_OPS[np.random.randint(0, len(ALU_OPS), size=NUM_TESTS)]
 
-        alu_dut.A.value = BinaryValue(a_val, n_bits=8)
-        alu_dut.B.value = BinaryValue(b_val, n_bits=8)
-        alu_dut.operation.value = BinaryValue(op_val, n_bits=4)
+    # Record all DUT outputs as (result, nzp); checked against the golden model in one batch afterwards
+    dut_results = np.empty((NUM_TESTS, 2), dtype=np.int32)
+    for i, (a_val, b_val, op_val) in enumerate(zip(a_vals.tolist(), b_vals.tolist(), ops.tolist())):
+        sig_a.value = a_val
+        sig_b.value = b_val
+        sig_op.value = op_val
 
         await Timer(1, units='ns')
 
-        dut_out = {
-            'result': int(alu_dut.result.value),
-            'nzp': int(alu_dut.NZP.value)
-        }
+        dut_results[i] = (sig_result.value.integer, sig_nzp.value.integer)
 
-        golden = golden_alu(a_val, b_val, op_val)
+    # Golden model predictions for the whole batch
+    golden_results = np.column_stack(golden_alu_batch(a_vals, b_vals, ops))
 
-        assert dut_out == golden, f"Mismatch for op={hex(op_val)}, A={hex(a_val)}, B={hex(b_val)}: DUT {dut_out} vs Golden {golden}"
+    mismatches = np.flatnonzero((dut_results != golden_results).any(axis=1))
+    for i in mismatches[:10]:
+        dut._log.error(f"Mismatch for op={hex(ops[i])}, A={hex(a_vals[i])}, B={hex(b_vals[i])}: DUT result={dut_results[i, 0]} nzp={dut_results[i, 1]:03b} vs Golden result={golden_results[i, 0]} nzp={golden_results[i, 1]:03b}")
+    assert mismatches.size == 0, f"{mismatches.size} of {NUM_TESTS} ALU operations mismatched"
 
     dut._log.info(f"Passed {NUM_TESTS} random tests.")